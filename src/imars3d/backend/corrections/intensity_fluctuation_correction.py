@@ -2,17 +2,26 @@
 # -*- coding: utf-8 -*-
 """iMars3D's intensity fluctuation correction module."""
 import logging
-from imars3d.backend.util.functions import clamp_max_workers, calculate_chunksize
+from typing import Optional
+from imars3d.backend.util.functions import clamp_max_workers
 import numpy as np
 import param
-import tomopy
-from skimage import feature
-from multiprocessing.managers import SharedMemoryManager
-from tqdm.contrib.concurrent import process_map
-from functools import partial
+import multiprocessing
+from multiprocessing import shared_memory
+from tqdm.auto import tqdm
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+try:
+    import numba
+except ImportError:
+    numba = None
 
 logger = logging.getLogger(__name__)
 
+# number of slabs of radiographs per worker process of the auto air region detection
+_IFC_SLABS_PER_WORKER = 4
+
 
 class intensity_fluctuation_correction(param.ParameterizedFunction):
     """
@@ -32,10 +41,13 @@ class intensity_fluctuation_correction(param.ParameterizedFunction):
         The number of cores to use for parallel processing, default is 0, which means using all available cores.
     tqdm_class: panel.widgets.Tqdm
         Class to be used for rendering tqdm progress
+    backend: str = "cpu"
+        Device used for the auto air region detection, either "cpu" or "cuda". The "cuda" backend
+        requires cupy, which can be installed by ``pip install cupy-cuda12x``.
 
     Returns
     -------
-        The corrected image/radiograph stack.
+        The corrected image/radiograph stack, in float32 for float64 input.
     """
 
     ct = param.Array(doc="The image/radiograph stack to correct for beam intensity fluctuation.", default=None)
@@ -53,6 +65,11 @@ class intensity_fluctuation_correction(param.ParameterizedFunction):
         doc="The number of cores to use for parallel processing, default is 0, which means using all available cores.",
     )
     tqdm_class = param.ClassSelector(class_=object, doc="Progress bar to render with")
+    backend = param.Selector(
+        default="cpu",
+        objects=["cpu", "cuda"],
+        doc="Device used for the auto air region detection, either cpu or cuda (requires cupy).",
+    )
 
     def __call__(self, **params):
         """Call the function."""
@@ -66,53 +83,210 @@ class intensity_fluctuation_correction(param.ParameterizedFunction):
         self.max_workers = clamp_max_workers(params.max_workers)
         logger.debug(f"max_workers={self.max_workers}")
         corrected_array = self._intensity_fluctuation_correction(
-            params.ct, params.air_pixels, params.sigma, self.max_workers, params.tqdm_class
+            params.ct, params.air_pixels, params.sigma, self.max_workers, params.tqdm_class, params.backend
         )
         logger.info("FINISHED Executing Filter: Intensity Fluctuation Correction")
         return corrected_array
 
-    def _intensity_fluctuation_correction(self, ct, air_pixels, sigma, max_workers, tqdm_class):
+    def _intensity_fluctuation_correction(self, ct, air_pixels, sigma, max_workers, tqdm_class, backend="cpu"):
         """Correct for intensity fluctuation in the radiograph."""
         # validation
         if ct.ndim not in (2, 3):
             raise ValueError("The image/radiograph stack must be 2D or 3D.")
+        # NOTE: the correction is a reduction followed by a division, which does not need
+        #       double precision, hence float64 stacks are processed in float32 to halve the
+        #       memory traffic. The correction factors are still accumulated in float64.
+        dtype = np.dtype(np.float32) if ct.dtype == np.float64 else ct.dtype
+        if dtype != ct.dtype:
+            logger.debug("Processing the float64 stack in float32.")
         # process
-        if air_pixels < 0:
+        if air_pixels < 0 and backend == "cuda":
+            # auto air region detection on the GPU
+            return _intensity_fluctuation_correction_cuda(ct, sigma, dtype)
+        elif air_pixels < 0:
             # auto air region detection
-            with SharedMemoryManager() as smm:
-                # create the shared memory
-                shm = smm.SharedMemory(ct.nbytes)
+            # NOTE: the radiographs are corrected in place within the shared memory copy
+            #       of the stack, a second shared memory block is only needed when the
+            #       division promotes the dtype, i.e. integer input to float64.
+            out_dtype = dtype if np.issubdtype(dtype, np.floating) else np.dtype(np.float64)
+            inplace = out_dtype == dtype
+            # NOTE: the shared memory blocks are created directly rather than through a
+            #       SharedMemoryManager, which would spawn a manager process for them, and
+            #       are recorded as soon as created such that they are always released.
+            blocks = []
+            try:
+                shm = shared_memory.SharedMemory(create=True, size=ct.size * dtype.itemsize)
+                blocks.append(shm)
+                if inplace:
+                    shm_out = shm
+                else:
+                    shm_out = shared_memory.SharedMemory(create=True, size=ct.size * out_dtype.itemsize)
+                    blocks.append(shm_out)
                 # create a numpy array point to the shared memory
                 shm_arrays = np.ndarray(
                     ct.shape,
-                    dtype=ct.dtype,
+                    dtype=dtype,
                     buffer=shm.buf,
                 )
-                # copy data
-                np.copyto(shm_arrays, ct)
-                # map the multiprocessing calls
-                kwargs = {
-                    "max_workers": max_workers,
-                    "chunksize": calculate_chunksize(ct.shape[0], max_workers),
-                    "desc": "intensity_fluctuation_correction",
-                }
-                if tqdm_class:
-                    kwargs["tqdm_class"] = tqdm_class
-                rst = process_map(
-                    partial(intensity_fluctuation_correction_skimage, sigma=sigma),
-                    [img for img in shm_arrays],
-                    **kwargs,
+                # copy data, casting to the working dtype on the fly
+                np.copyto(shm_arrays, ct, casting="same_kind")
+                # split the stack into a few contiguous slabs of radiographs per worker
+                # NOTE: the radiographs are corrected independently from each other, hence
+                #       no halo is needed between the slabs. Several slabs per worker keep
+                #       the progress bar moving and balance the load between the workers.
+                slabs = np.array_split(np.arange(ct.shape[0]), min(ct.shape[0], _IFC_SLABS_PER_WORKER * max_workers))
+                z_ranges = [(int(slab[0]), int(slab[-1]) + 1) for slab in slabs]
+                # no more workers than slabs, e.g. for a short stack
+                n_workers = min(max_workers, len(z_ranges))
+                # NOTE: the workers attach to the shared memory blocks once in their initializer,
+                #       which also receives the settings shared by all the tasks, such that each
+                #       task only pickles its z range and never any array data.
+                initargs = (
+                    shm.name,
+                    shm_out.name,
+                    ct.shape,
+                    dtype,
+                    out_dtype,
+                    sigma,
+                    max(1, numba.config.NUMBA_NUM_THREADS // n_workers) if numba else 1,
+                )
+                progress_bar = tqdm if tqdm_class is None else tqdm_class
+                with ProcessPoolExecutor(
+                    max_workers=n_workers,
+                    mp_context=_ifc_mp_context(),
+                    initializer=_init_ifc_worker,
+                    initargs=initargs,
+                ) as executor:
+                    futures = [executor.submit(_intensity_fluctuation_correction_shm, z_range) for z_range in z_ranges]
+                    for future in progress_bar(
+                        as_completed(futures), total=len(futures), desc="intensity_fluctuation_correction"
+                    ):
+                        # re-raise any exception from the worker
+                        future.result()
+                # copy the results out before the shared memory is released
+                shm_out_arrays = np.ndarray(
+                    ct.shape,
+                    dtype=out_dtype,
+                    buffer=shm_out.buf,
                 )
+                corrected_array = shm_out_arrays.copy()
+            finally:
+                # the views must be released before the buffers can be closed
+                shm_arrays = shm_out_arrays = None
+                for block in blocks:
+                    block.close()
+                    block.unlink()
             #
-            return np.array(rst)
+            return corrected_array
+        elif max_workers == 1:
+            # NOTE: on a single core, the vectorized version avoids the overhead of tomopy
+            #       for the handful of arithmetic operations needed per row.
+            return _normalize_bg_fast(ct, air_pixels)
         else:
             # use tomopy process
+            # NOTE: tomopy is imported on demand as it is slow to import and not needed
+            #       by the auto air region detection.
+            import tomopy
+
             return tomopy.normalize_bg(ct, air=air_pixels, ncore=max_workers)
 
 
+def _normalize_bg_fast(ct: np.ndarray, air: int) -> np.ndarray:
+    """Vectorized version of ``tomopy.normalize_bg``.
+
+    Each row of each radiograph is divided by the linear interpolation between the
+    average of its ``air`` leftmost pixels and the average of its ``air`` rightmost
+    pixels, where non-positive averages are replaced by 1 as done by tomopy.
+
+    Parameters
+    ----------
+    ct: np.ndarray
+        The image/radiograph stack (or a single 2D radiograph) to correct.
+    air: int
+        Number of pixels at each boundary to calculate the scaling factor.
+
+    Returns
+    -------
+        The corrected image/radiograph stack in float32, same as tomopy.
+    """
+    ct = np.asarray(ct, dtype=np.float32)
+    n_cols = ct.shape[-1]
+    air_left = ct[..., :air].mean(axis=-1, keepdims=True)
+    air_right = ct[..., n_cols - air :].mean(axis=-1, keepdims=True)
+    air_left[air_left <= 0] = 1
+    air_right[air_right <= 0] = 1
+    slope = (air_right - air_left) / (n_cols - 1)
+    # build the interpolated background in the output buffer, then divide in place
+    corrected = np.multiply(slope, np.arange(n_cols, dtype=np.float32))
+    corrected += air_left
+    return np.divide(ct, corrected, out=corrected)
+
+
+def _ifc_mp_context() -> Optional[multiprocessing.context.BaseContext]:
+    """Multiprocessing context of the IFC worker pool, None for the default one.
+
+    Forking a process that has already started the numba threading layer, e.g. after a
+    direct call to ``intensity_fluctuation_correction_skimage``, leaves the workers or the
+    calling process hanging with the tbb and omp threading layers. Only in that case are
+    the workers started from a fork server instead, or spawned where there is none, which
+    requires scripts to guard their entry point with ``if __name__ == "__main__":``.
+    """
+    if numba is None:
+        return None
+    try:
+        # raises a ValueError as long as no parallel kernel has run in this process
+        numba.threading_layer()
+    except ValueError:
+        return None
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    logger.debug(f"numba threading layer started, starting the IFC workers with {method}")
+    return multiprocessing.get_context(method)
+
+
+# state of an IFC worker process, set by _init_ifc_worker
+_ifc_worker_state = {}
+
+
+def _init_ifc_worker(
+    shm_name: str,
+    shm_out_name: str,
+    shape: tuple,
+    dtype: np.dtype,
+    out_dtype: np.dtype,
+    sigma: int,
+    n_threads: int = 1,
+) -> None:
+    """Attach an IFC worker process to the shared memory stack and store the settings of the batch."""
+    # share the cores between the worker processes for the numba canny kernel
+    if numba is not None:
+        numba.set_num_threads(n_threads)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    shm_out = shm if shm_out_name == shm_name else shared_memory.SharedMemory(name=shm_out_name)
+    # NOTE: the blocks are kept open for the lifetime of the worker process, which
+    #       ends before the main process unlinks them.
+    _ifc_worker_state.update(
+        shm=shm,
+        shm_out=shm_out,
+        arrays=np.ndarray(shape, dtype=dtype, buffer=shm.buf),
+        out_arrays=np.ndarray(shape, dtype=out_dtype, buffer=shm_out.buf),
+        sigma=sigma,
+    )
+
+
+def _intensity_fluctuation_correction_shm(z_range: tuple) -> None:
+    """Correct the radiographs within [start, stop) of the shared memory stack in a worker process."""
+    arrays = _ifc_worker_state["arrays"]
+    out_arrays = _ifc_worker_state["out_arrays"]
+    sigma = _ifc_worker_state["sigma"]
+    for idx in range(*z_range):
+        intensity_fluctuation_correction_skimage(arrays[idx], sigma=sigma, out=out_arrays[idx])
+
+
 def intensity_fluctuation_correction_skimage(
     image: np.ndarray,
     sigma: int = 3,
+    out: Optional[np.ndarray] = None,
+    max_air_width: Optional[int] = None,
 ) -> np.ndarray:
     """IFC via skimage.
 
@@ -125,6 +299,11 @@ def intensity_fluctuation_correction_skimage(
         The image/radiograph (2D) to correct for beam intensity fluctuation.
     sigma: int
         The standard deviation of the Gaussian filter for the canny edge detection.
+    out: Optional[np.ndarray]
+        Array to write the corrected image/radiograph into, a new array is allocated if not given.
+    max_air_width: Optional[int]
+        Width of the left and right margins searched for the object bound, default to
+        ``min(n_cols // 4, 64)``.
 
     Returns
     -------
@@ -137,6 +316,8 @@ def intensity_fluctuation_correction_skimage(
         the linear interpolation between left and right air pixels.
         In most cases, a uniform decay is a good approximation as neutron beam tends
         to be very stable.
+        When numba is installed, the canny edge detection is done with a multi-threaded
+        numba port of the skimage implementation, which yields the same edges.
     """
     # get boundary
     # NOTE:
@@ -146,27 +327,22 @@ def intensity_fluctuation_correction_skimage(
     #   mark at least the second outmost ring of pixels as edge, therefore we will
     #   have at least one air pixels to work with, which is consistent with the
     #   default air=1 from tomopy.normalize_bg
-    edge = feature.canny(image, sigma=sigma)
-    # Find the middle col position, for a 512x512 image, this would be 255
-    middle_col = (edge.shape[1] - 1) // 2
-    # Use the middle col as starting guess for the left and right bound for each
-    # row, we will move it to the left and right as we go through each row in the
-    # image, i.e. finding the rough contour of the object.
-    start_cols = np.ones(edge.shape[0], dtype=int) * middle_col
-    stop_cols = np.ones(edge.shape[0], dtype=int) * middle_col
-    for i, row in enumerate(edge):
-        # here we are checking if there is any pixel marked to be an edge (True)
-        # if there is at least one pixel, we will start moving the left and right
-        # bound, otherwise we will keep them at the middle col, i.e. using the
-        # whole row as the air pixels.
-        isedge = row > 0
-        if isedge.any():
-            w = np.where(isedge)[0]
-            # mark the first edge pixel to be the new left bound for current row,
-            # and the last edge pixel to be the new right bound.
-            start_cols[i], stop_cols[i] = w[0], w[-1]
+    #   3. Only the leftmost and rightmost edges matter, hence the edge detection
+    #   is limited to the two outer margins of the image. The first edge pixel of
+    #   each row in the left margin and the last one in the right margin are used
+    #   as the left and right bound of the object, i.e. the rough contour of the
+    #   object. Rows without any edge pixel within a margin use the whole margin
+    #   as the air pixels, hence their bound is set at twice the margin width from
+    #   the edge of the image, which the halving below brings back to the margin.
+    #   4. argmax returns the index of the first True along each row, and running
+    #   it on the column-reversed mask gives the last one.
+    n_cols = image.shape[1]
+    width = _air_width(n_cols, max_air_width)
+    left_edge = _canny(image[:, :width], sigma=sigma)
+    right_edge = _canny(image[:, n_cols - width :], sigma=sigma)
+    start_cols = np.where(left_edge.any(axis=1), left_edge.argmax(axis=1), 2 * width)
+    stop_cols = np.where(right_edge.any(axis=1), n_cols - 1 - right_edge[:, ::-1].argmax(axis=1), n_cols - 2 * width)
     # get background
-    _, n_cols = image.shape
     # Instead of blindly trusting the contour derived from canny edge detection,
     # we are using the middle pixel between the bound and the edge of the image
     # as the bound of the object.
@@ -174,15 +350,17 @@ def intensity_fluctuation_correction_skimage(
     # the left bound is at 12 and right bound is at 120, we will move the two
     # bounds closer to the edge, i.e 6 as the new left bound, and 124 as the
     # right bound.
-    start_cols = start_cols // 2
-    stop_cols = (stop_cols + n_cols) // 2
+    # NOTE: both bounds are freshly allocated by np.where, hence updated in place.
+    np.floor_divide(start_cols, 2, out=start_cols)
+    stop_cols += n_cols
+    np.floor_divide(stop_cols, 2, out=stop_cols)
     # compute bg
-    # NOTE: We are gathering all pixels considered to be air pixels row by row.
+    # NOTE: We are marking all pixels considered to be air pixels row by row.
     #       For example, in a image of 3x10 with left and right bounds at
     #       3, 8
     #       1, 7,
     #       2, 8
-    #       the final collection of air pixels (1D array) will be
+    #       the air pixels will be
     #       [ img[0,0], img[0,1], img[0,2],
     #         img[1,0],
     #         img[2,0], img[2,1],
@@ -190,16 +368,334 @@ def intensity_fluctuation_correction_skimage(
     #         img[1,6], img[1,7], img[1,8], img[1,9],
     #         img[0,7], img[0,8], img[0,9],
     #       ]
-    #       the average value of the 1D array above will be used to normalize
+    #       the average value of the air pixels above will be used to normalize
     #       the corresponding image.
-    left = np.array([])
-    right = np.array([])
-    for i, row in enumerate(image):
-        left = np.concatenate((left, row[: start_cols[i]]))
-        right = np.concatenate((right, row[stop_cols[i] :]))
-    factor = np.concatenate((left, right)).mean()
+    cols = np.arange(n_cols)
+    air_mask = (cols < start_cols[:, None]) | (cols >= stop_cols[:, None])
+    # NOTE: einsum fuses the masking and the accumulation into a single pass over the
+    #       image, without the temporary masked copy.
+    factor = np.einsum("ij,ij->", image, air_mask, dtype=np.float64) / np.count_nonzero(air_mask)
     # apply the correction factor
-    return image / factor
+    return np.divide(image, factor, out=out)
+
+
+def _air_width(n_cols: int, max_air_width: Optional[int] = None) -> int:
+    """Width of the image margins searched for the object bound during the auto air region detection."""
+    width = min(n_cols // 4, 64) if max_air_width is None else max_air_width
+    return int(min(max(width, 1), n_cols))
+
+
+def _canny(image: np.ndarray, sigma: float) -> np.ndarray:
+    """Canny edge detection with the numba kernel when numba is installed, skimage otherwise.
+
+    The image is converted once into a C-contiguous float32 buffer, where integer images are
+    scaled to [0, 1] as skimage does, so that the edge detection neither upcasts to float64 nor
+    makes further copies of the input.
+    """
+    if np.issubdtype(image.dtype, np.integer):
+        image = np.multiply(image, 1.0 / np.iinfo(image.dtype).max, dtype=np.float32)
+    else:
+        image = np.ascontiguousarray(image, dtype=np.float32)
+    if numba is None:
+        from skimage import feature
+
+        return feature.canny(image, sigma=sigma)
+    return make_ifc_kernel(*image.shape, sigma)(image)
+
+
+def _gaussian_kernel(sigma: float, truncate: float = 4.0) -> np.ndarray:
+    """Return the 1D Gaussian kernel used by scipy.ndimage.gaussian_filter."""
+    radius = int(truncate * sigma + 0.5)
+    x = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 / (sigma * sigma) * x**2)
+    return kernel / kernel.sum()
+
+
+@lru_cache(maxsize=None)
+def make_ifc_kernel(n_rows: int, n_cols: int, sigma: float):
+    """Compile the canny edge detection used by the IFC for a fixed image shape and sigma.
+
+    Numba port of ``skimage.feature.canny`` with its default settings, where the
+    Gaussian smoothing, the Sobel gradients and the non-maximum suppression are
+    parallelized over the rows of the image and write into preallocated scratch
+    buffers, followed by an edge tracking pass for the hysteresis thresholding.
+    The arithmetic follows scipy.ndimage and skimage step by step such that the
+    edges are identical to the ones from skimage.
+
+    The image shape and the Gaussian kernel are compile time constants of the
+    returned kernel, which lets numba unroll and vectorize the inner loops. As the
+    shape of the radiographs is fixed for a given detector, the compiled kernels are
+    cached both in memory and on disk.
+
+    Parameters
+    ----------
+    n_rows:
+        Number of rows of the images.
+    n_cols:
+        Number of columns of the images.
+    sigma:
+        The standard deviation of the Gaussian filter.
+
+    Returns
+    -------
+        Compiled function taking a C-contiguous float32 or float64 image of shape
+        (n_rows, n_cols) and returning its boolean edge mask.
+    """
+    if numba is None:
+        logger.warning("To use the specialized IFC kernel, make sure to install numba.")
+        raise RuntimeError("numba not installed, please install numba to use the specialized IFC kernel")
+    kernel = _gaussian_kernel(sigma)
+    radius = kernel.shape[0] // 2
+    low_threshold, high_threshold = 0.1, 0.2
+
+    def canny(image):
+        if image.shape[0] != n_rows or image.shape[1] != n_cols:
+            raise ValueError("The image does not match the shape of the kernel.")
+        tmp = np.empty_like(image)
+        smoothed = np.empty_like(image)
+        bleed_tmp = np.empty_like(image)
+        bleed_over = np.empty_like(image)
+        eps = np.finfo(image.dtype).eps
+        # gaussian smoothing with zero padding, along the rows first then along the cols,
+        # for both the image and the mask used to compensate for the zero padding
+        for i in numba.prange(n_rows):
+            for j in range(n_cols):
+                acc = image[i, j] * kernel[radius]
+                acc_mask = kernel[radius]
+                for k in range(radius, 0, -1):
+                    up = image[i - k, j] if i - k >= 0 else 0.0
+                    down = image[i + k, j] if i + k < n_rows else 0.0
+                    acc += (up + down) * kernel[radius + k]
+                    acc_mask += ((1.0 if i - k >= 0 else 0.0) + (1.0 if i + k < n_rows else 0.0)) * kernel[radius + k]
+                tmp[i, j] = acc
+                bleed_tmp[i, j] = acc_mask
+        for i in numba.prange(n_rows):
+            for j in range(n_cols):
+                acc = tmp[i, j] * kernel[radius]
+                acc_mask = bleed_tmp[i, j] * kernel[radius]
+                for k in range(radius, 0, -1):
+                    left = tmp[i, j - k] if j - k >= 0 else 0.0
+                    right = tmp[i, j + k] if j + k < n_cols else 0.0
+                    acc += (left + right) * kernel[radius + k]
+                    left = bleed_tmp[i, j - k] if j - k >= 0 else 0.0
+                    right = bleed_tmp[i, j + k] if j + k < n_cols else 0.0
+                    acc_mask += (left + right) * kernel[radius + k]
+                smoothed[i, j] = acc
+                bleed_over[i, j] = acc_mask
+                bleed_over[i, j] += eps
+                smoothed[i, j] /= bleed_over[i, j]
+        # sobel gradients with reflective boundary, i.e. derivative along one axis followed
+        # by the [1, 2, 1] smoothing along the other axis
+        isobel = np.empty_like(image)
+        jsobel = np.empty_like(image)
+        for i in numba.prange(n_rows):
+            up, down = max(i - 1, 0), min(i + 1, n_rows - 1)
+            for j in range(n_cols):
+                left, right = max(j - 1, 0), min(j + 1, n_cols - 1)
+                tmp[i, j] = 1.0 * smoothed[down, j] - smoothed[up, j]
+                bleed_tmp[i, j] = 1.0 * smoothed[i, right] - smoothed[i, left]
+        for i in numba.prange(n_rows):
+            up, down = max(i - 1, 0), min(i + 1, n_rows - 1)
+            for j in range(n_cols):
+                left, right = max(j - 1, 0), min(j + 1, n_cols - 1)
+                isobel[i, j] = tmp[i, j] * 2.0 + (1.0 * tmp[i, left] + tmp[i, right])
+                jsobel[i, j] = bleed_tmp[i, j] * 2.0 + (1.0 * bleed_tmp[up, j] + bleed_tmp[down, j])
+        magnitude = np.empty_like(image)
+        for i in numba.prange(n_rows):
+            for j in range(n_cols):
+                m = isobel[i, j] * isobel[i, j]
+                m += jsobel[i, j] * jsobel[i, j]
+                magnitude[i, j] = np.sqrt(m)
+        # non-maximum suppression for the interior pixels, where the magnitude is compared against
+        # the two neighbors along the gradient direction, bilinearly interpolated from the closest
+        # axial and diagonal pixels
+        candidate = np.zeros((n_rows, n_cols), dtype=np.bool_)
+        strong = np.zeros((n_rows, n_cols), dtype=np.bool_)
+        for i in numba.prange(1, n_rows - 1):
+            for j in range(1, n_cols - 1):
+                m = magnitude[i, j]
+                if m < low_threshold:
+                    continue
+                gi, gj = isobel[i, j], jsobel[i, j]
+                abs_gi, abs_gj = abs(gi), abs(gj)
+                # +1 if the gradient points to the (+, +) or (-, -) quadrant, -1 otherwise
+                s = 1 if (gi >= 0 and gj >= 0) or (gi <= 0 and gj <= 0) else -1
+                if abs_gi > abs_gj:
+                    w = abs_gj / abs_gi
+                    neigh1_1, neigh1_2 = magnitude[i + s, j], magnitude[i + s, j + 1]
+                    neigh2_1, neigh2_2 = magnitude[i - s, j], magnitude[i - s, j - 1]
+                else:
+                    w = abs_gi / abs_gj
+                    neigh1_1, neigh1_2 = magnitude[i, j + 1], magnitude[i + s, j + 1]
+                    neigh2_1, neigh2_2 = magnitude[i, j - 1], magnitude[i - s, j - 1]
+                if neigh1_2 * w + neigh1_1 * (1.0 - w) <= m and neigh2_2 * w + neigh2_1 * (1.0 - w) <= m:
+                    candidate[i, j] = True
+                    strong[i, j] = m >= high_threshold
+        # hysteresis thresholding, keep the candidates 8-connected to at least one strong pixel
+        edge = np.zeros((n_rows, n_cols), dtype=np.bool_)
+        stack = np.empty(n_rows * n_cols, dtype=np.int64)
+        for seed in range(n_rows * n_cols):
+            if not strong.flat[seed] or edge.flat[seed]:
+                continue
+            edge.flat[seed] = True
+            stack[0] = seed
+            n = 1
+            while n > 0:
+                n -= 1
+                i, j = divmod(stack[n], n_cols)
+                for di in range(-1, 2):
+                    for dj in range(-1, 2):
+                        ii, jj = i + di, j + dj
+                        if 0 <= ii < n_rows and 0 <= jj < n_cols and candidate[ii, jj] and not edge[ii, jj]:
+                            edge[ii, jj] = True
+                            stack[n] = ii * n_cols + jj
+                            n += 1
+        return edge
+
+    return numba.njit(parallel=True, cache=True)(canny)
+
+
+# number of float32 images worth of scratch memory needed per radiograph by the cuda backend
+_CUDA_SCRATCH_IMAGES = 24
+
+
+def _intensity_fluctuation_correction_cuda(ct: np.ndarray, sigma: int, dtype: Optional[np.dtype] = None) -> np.ndarray:
+    """IFC with auto air region detection on a CUDA device.
+
+    Same algorithm as ``intensity_fluctuation_correction_skimage``, but every step is
+    vectorized along the stack axis with cupy, i.e. the radiographs are uploaded to the
+    device once, corrected in a handful of batched kernel launches, and downloaded once.
+    The stack is only split into several batches when it does not fit in the device memory.
+
+    Parameters
+    ----------
+    ct: np.ndarray
+        The image/radiograph stack (or a single 2D radiograph) to correct.
+    sigma: int
+        The standard deviation of the Gaussian filter for the canny edge detection.
+    dtype: Optional[np.dtype]
+        The dtype the radiographs are processed in, default to the dtype of ``ct``.
+
+    Returns
+    -------
+        The corrected image/radiograph stack.
+    """
+    # NOTE: cupy is imported on demand as it is slow to import and only needed by
+    #       the cuda backend.
+    try:
+        import cupy as cp
+        from cupyx.scipy import ndimage as cp_ndi
+    except ImportError:
+        logger.warning("To use the cuda backend, make sure to install cupy.")
+        raise RuntimeError("cupy not installed, please install cupy to use the cuda backend")
+    dtype = ct.dtype if dtype is None else np.dtype(dtype)
+    out_dtype = dtype if np.issubdtype(dtype, np.floating) else np.dtype(np.float64)
+    stack = ct if ct.ndim == 3 else ct[np.newaxis]
+    _, n_rows, n_cols = stack.shape
+    corrected_array = np.empty(stack.shape, dtype=out_dtype)
+    # NOTE: the canny edge detection needs about _CUDA_SCRATCH_IMAGES float32 images worth
+    #       of device memory per radiograph, use at most half of the free device memory.
+    free_bytes, _ = cp.cuda.Device().mem_info
+    batch_size = max(1, int(free_bytes // 2 // (n_rows * n_cols * 4 * _CUDA_SCRATCH_IMAGES)))
+    width = _air_width(n_cols)
+    cols = cp.arange(n_cols)
+    for start in range(0, stack.shape[0], batch_size):
+        images = cp.asarray(stack[start : start + batch_size]).astype(dtype, copy=False)
+        # canny works on floating images within [0, 1] for integer input, same as skimage
+        scale = cp.iinfo(images.dtype).max if cp.issubdtype(images.dtype, cp.integer) else 1
+        left_edge = _canny_stack(images[:, :, :width].astype(cp.float32) / scale, sigma, cp, cp_ndi)
+        right_edge = _canny_stack(images[:, :, n_cols - width :].astype(cp.float32) / scale, sigma, cp, cp_ndi)
+        # bounds of the object for each row of each radiograph from the edges within the
+        # outer margins, see intensity_fluctuation_correction_skimage for details
+        start_cols = cp.where(left_edge.any(axis=2), left_edge.argmax(axis=2), 2 * width) // 2
+        stop_cols = cp.where(
+            right_edge.any(axis=2), n_cols - 1 - right_edge[:, :, ::-1].argmax(axis=2), n_cols - 2 * width
+        )
+        stop_cols = (stop_cols + n_cols) // 2
+        air_mask = (cols < start_cols[..., None]) | (cols >= stop_cols[..., None])
+        factor = cp.where(air_mask, images, 0).sum(axis=(1, 2), dtype=cp.float64) / air_mask.sum(axis=(1, 2))
+        corrected = (images / factor[:, None, None]).astype(out_dtype, copy=False)
+        corrected_array[start : start + batch_size] = cp.asnumpy(corrected)
+    return corrected_array if ct.ndim == 3 else corrected_array[0]
+
+
+def _canny_stack(stack, sigma: float, xp, ndi, low_threshold: float = 0.1, high_threshold: float = 0.2):
+    """Canny edge detection of every image in a stack.
+
+    Array level port of ``skimage.feature.canny`` with its default settings that processes
+    all images of the stack at once, using the array module ``xp`` and its matching ndimage
+    module ``ndi``, i.e. numpy with scipy.ndimage, or cupy with cupyx.scipy.ndimage.
+
+    Parameters
+    ----------
+    stack:
+        Floating point image stack of shape (n_images, n_rows, n_cols).
+    sigma:
+        The standard deviation of the Gaussian filter.
+    xp:
+        Array module.
+    ndi:
+        ndimage module matching ``xp``.
+    low_threshold:
+        Lower bound for hysteresis thresholding (linking edges).
+    high_threshold:
+        Upper bound for hysteresis thresholding (linking edges).
+
+    Returns
+    -------
+        Boolean edge mask of the same shape as the stack.
+    """
+    n_rows, n_cols = stack.shape[1:]
+    # gaussian smoothing within each image, compensated for the zero padding at the boundary
+    bleed_over = ndi.gaussian_filter(xp.ones((n_rows, n_cols), dtype=stack.dtype), sigma, mode="constant")
+    bleed_over += xp.finfo(stack.dtype).eps
+    smoothed = ndi.gaussian_filter(stack, (0, sigma, sigma), mode="constant")
+    smoothed /= bleed_over
+    # sobel gradients within each image
+    # NOTE: ndi.sobel smooths along all the other axes, including the stack axis, hence the
+    #       explicit separable filters here. The weights are arrays of the array module, as
+    #       cupyx.scipy.ndimage does not accept lists.
+    derivative = xp.asarray([-1, 0, 1], dtype=stack.dtype)
+    smoothing = xp.asarray([1, 2, 1], dtype=stack.dtype)
+    isobel = ndi.correlate1d(ndi.correlate1d(smoothed, derivative, axis=1), smoothing, axis=2)
+    jsobel = ndi.correlate1d(ndi.correlate1d(smoothed, derivative, axis=2), smoothing, axis=1)
+    magnitude = xp.hypot(isobel, jsobel)
+    # non-maximum suppression for the interior pixels, where the magnitude is compared against
+    # the two neighbors along the gradient direction, bilinearly interpolated from the closest
+    # axial and diagonal pixels
+    m = magnitude[:, 1:-1, 1:-1]
+    isobel = isobel[:, 1:-1, 1:-1]
+    jsobel = jsobel[:, 1:-1, 1:-1]
+    abs_isobel, abs_jsobel = xp.abs(isobel), xp.abs(jsobel)
+
+    def neighbor(di, dj):
+        return magnitude[:, 1 + di : n_rows - 1 + di, 1 + dj : n_cols - 1 + dj]
+
+    larger = xp.maximum(abs_isobel, abs_jsobel)
+    w = xp.minimum(abs_isobel, abs_jsobel) / xp.where(larger > 0, larger, 1)
+    # gradient pointing to the (+, +) or (-, -) quadrant
+    same_sign = ((isobel >= 0) & (jsobel >= 0)) | ((isobel <= 0) & (jsobel <= 0))
+    # gradient closer to the row axis than to the column axis
+    vertical = abs_isobel > abs_jsobel
+    neigh1_1 = xp.where(vertical, xp.where(same_sign, neighbor(1, 0), neighbor(-1, 0)), neighbor(0, 1))
+    neigh2_1 = xp.where(vertical, xp.where(same_sign, neighbor(-1, 0), neighbor(1, 0)), neighbor(0, -1))
+    neigh1_2 = xp.where(same_sign, neighbor(1, 1), neighbor(-1, 1))
+    neigh2_2 = xp.where(same_sign, neighbor(-1, -1), neighbor(1, -1))
+    local_max = (m >= low_threshold) & (neigh1_2 * w + neigh1_1 * (1.0 - w) <= m)
+    local_max &= neigh2_2 * w + neigh2_1 * (1.0 - w) <= m
+    # hysteresis thresholding, keep the candidates connected to at least one strong edge
+    # pixel within the same image
+    low_mask = xp.zeros(stack.shape, dtype=bool)
+    low_mask[:, 1:-1, 1:-1] = local_max
+    high_mask = xp.zeros(stack.shape, dtype=bool)
+    high_mask[:, 1:-1, 1:-1] = local_max & (m >= high_threshold)
+    structure = xp.zeros((3, 3, 3), dtype=bool)
+    structure[1] = True
+    labels, count = ndi.label(low_mask, structure)
+    good_label = xp.zeros(int(count) + 1, dtype=bool)
+    good_label[labels[high_mask]] = True
+    good_label[0] = False
+    return good_label[labels]
 
 
 class normalize_roi(param.ParameterizedFunction):
@@ -256,5 +752,28 @@ class normalize_roi(param.ParameterizedFunction):
         # sanity check
         if ct.ndim != 3:
             raise ValueError("This correction can only be used for a stack, i.e. a 3D image.")
-        proj_norm_beam_fluctuation = tomopy.prep.normalize.normalize_roi(ct, roi=roi, ncore=max_workers)
-        return proj_norm_beam_fluctuation
+        return normalize_roi_fast(ct, roi, max_workers)
+
+
+def normalize_roi_fast(ct: np.ndarray, roi: list, ncore: Optional[int] = None) -> np.ndarray:
+    """Normalize raw projection data using an average of a selected window on projection images.
+
+    Same as ``normalize_roi`` without the parameter validation, for callers that have already
+    validated their inputs and invoke the normalization repeatedly, e.g. once per slice.
+
+    Parameters
+    ----------
+    ct: np.ndarray
+        The image/radiograph stack.
+    roi: list
+        [top-left, top-right, bottom-left, bottom-right] pixel coordinates.
+    ncore: Optional[int]
+        The number of cores to use, default to all available cores.
+
+    Returns
+    -------
+        The normalized image/radiograph stack.
+    """
+    import tomopy
+
+    return tomopy.prep.normalize.normalize_roi(ct, roi=roi, ncore=ncore)
@@ -3,22 +3,26 @@
 
 # package imports
 from imars3d.backend.dataio.metadata import MetaData
-from imars3d.backend.util.functions import clamp_max_workers, to_time_str, calculate_chunksize
+from imars3d.backend.util.functions import clamp_max_workers, to_time_str
 
 # third party imports
 import numpy as np
 import param
 import tifffile
 from tqdm.auto import tqdm
-from tqdm.contrib.concurrent import process_map
+from tqdm.contrib.concurrent import thread_map
 
 # standard imports
-from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+import fnmatch
 from fnmatch import fnmatchcase
 import itertools
 import logging
+import os
 from pathlib import Path
 import re
+import tempfile
 from typing import Callable, List, Optional, Tuple, Union
 
 # ignore warnings generated by importing dxchange
@@ -28,11 +32,24 @@ with warnings.catch_warnings():
     warnings.simplefilter("ignore")
     import dxchange
 
+try:
+    import fitsio
+except ImportError:
+    fitsio = None
+
 # Custom types
 FlexPath = Union[str, Path]
 
 # setup module level logger
 logger = logging.getLogger(__name__)
+# rotation angle encoded in the file names, compiled once as it is matched for every file
+# Note
+# ----
+#   For the following file
+#       20191030_ironman_small_0070_300_440_0520.tif(f)
+#       20191030_ironman_small_0070_300_440_0520.fits
+#   the rotation angle is 300.44 degrees
+_ROTATION_ANGLE_REGEX = re.compile(r"\d{8}_\S*_\d{4}_(?P<deg>\d{3})_(?P<dec>\d{3})_\d*\.(?:tiff?|fits)")
 # METADATA_DICT = {
 #     65026: "ManufacturerStr:Andor",  # [ct, ob, dc]
 #     65027: "ExposureTime:70.000000",  # [ct, ob, dc]
@@ -103,6 +120,9 @@ class load_data(param.ParameterizedFunction):
         maximum number of processes allowed during loading, default to use a single core.
     tqdm_class: panel.widgets.Tqdm
         Class to be used for rendering tqdm progress
+    memmap_folder: Optional[str]
+        directory of the temporary files backing the stacks too large to fit in memory,
+        default to the system temporary directory
 
     Returns
     -------
@@ -150,6 +170,7 @@ class load_data(param.ParameterizedFunction):
         doc="Maximum number of processes allowed during loading",
     )
     tqdm_class = param.ClassSelector(class_=object, doc="Progress bar to render with")
+    memmap_folder = param.Foldername(default=None, doc="directory of the temporary files backing the large stacks")
 
     def __call__(self, **params):
         """Parse inputs and perform multiple dispatch."""
@@ -197,6 +218,7 @@ class load_data(param.ParameterizedFunction):
                 dc_fnmatch=params.get("dc_fnmatch", "*"),
                 max_workers=self.max_workers,
                 tqdm_class=params.tqdm_class,
+                memmap_folder=params.memmap_folder,
             )
 
         elif ("ct_files" in params.keys()) and ("ob_dir" in params.keys()):
@@ -214,6 +236,7 @@ class load_data(param.ParameterizedFunction):
                 dc_fnmatch=params.get("dc_fnmatch", "*"),
                 max_workers=self.max_workers,
                 tqdm_class=params.tqdm_class,
+                memmap_folder=params.memmap_folder,
             )
             ct_files = params.get("ct_files")
         elif sigs.intersection(ref) == {"dir"}:
@@ -235,6 +258,7 @@ class load_data(param.ParameterizedFunction):
                 dc_fnmatch=params.get("dc_fnmatch", "*"),
                 max_workers=self.max_workers,
                 tqdm_class=params.tqdm_class,
+                memmap_folder=params.memmap_folder,
             )
         else:
             logger.warning("No valid signature found, need to specify either files or dir")
@@ -276,7 +300,9 @@ def _forgiving_reader(
 
 
 # use _func to avoid sphinx pulling it into docs
-def _load_images(filelist: List[str], desc: str, max_workers: int, tqdm_class) -> np.ndarray:
+def _load_images(
+    filelist: List[str], desc: str, max_workers: int, tqdm_class, memmap_folder: Optional[FlexPath] = None
+) -> np.ndarray:
     """
     Load image data via dxchange.
 
@@ -287,9 +313,14 @@ def _load_images(filelist: List[str], desc: str, max_workers: int, tqdm_class) -
     desc:
         Description for progress bar.
     max_workers:
-        Maximum number of processes allowed during loading.
+        Maximum number of threads allowed during loading.
     tqdm_class: panel.widgets.Tqdm
         Class to be used for rendering tqdm progress
+    memmap_folder:
+        Directory of the temporary file backing the image stack with a memory map when
+        it would take more than half of the available memory, default to the system
+        temporary directory. The latter is often a RAM-backed tmpfs, which does not
+        relieve the memory.
 
     Returns
     -------
@@ -309,35 +340,168 @@ def _load_images(filelist: List[str], desc: str, max_workers: int, tqdm_class) -
         #       The `memmap` option is removed until we have a better understanding of the
         #       discrepancy.
         # reader = partial(tifffile.imread, out="memmap")
+        # tifffile gives the shape and dtype from the header, and decodes straight into the stack
+        probe = _probe_tiff
         reader = tifffile.imread
+        read_into = _read_tiff_into
     elif file_ext == ".fits":
-        reader = dxchange.read_fits
+        # NOTE: fitsio binds directly to CFITSIO and reads faster than astropy, which
+        #       dxchange relies on, fitsio can be installed by ``pip install fitsio``.
+        reader = dxchange.read_fits if fitsio is None else partial(fitsio.read, ext=0)
+        probe = partial(_probe_image, reader=reader)
+        read_into = partial(_read_into, reader=reader)
     else:
         logger.error(f"Unsupported file type: {file_ext}")
         raise ValueError("Unsupported file type.")
 
+    # the first readable file gives the shape and dtype of the stack
+    header = None
+    for first, filename in enumerate(filelist):
+        header = _forgiving_reader(filename, probe)
+        if header is not None:
+            break
+    if header is None:
+        return np.array([])
+    shape, dtype = header
+    # NOTE: the images are read into a preallocated stack instead of being stacked at
+    #       the end, which halves the peak memory and saves a copy of the whole stack.
+    shape = (len(filelist),) + shape
+    nbytes = np.prod(shape, dtype=np.int64) * np.dtype(dtype).itemsize
+    available = _available_memory()
+    if available is not None and nbytes > available // 2:
+        # NOTE: a stack this large would leave too little memory for the processing,
+        #       the OS pages it in and out of a temporary file instead, which is
+        #       removed once the stack is released.
+        logger.info(f"The {nbytes / 2**30:.1f} GiB {desc} stack exceeds half of the available memory.")
+        stack = _memmap_stack(shape, dtype, memmap_folder)
+    else:
+        stack = np.empty(shape, dtype=dtype)
+    loaded = np.zeros(len(filelist), dtype=bool)
+    # images that cannot be cast safely into the stack, by index
+    mismatched = {}
+
+    def load(idx: int) -> None:
+        # NOTE: same as _forgiving_reader, inlined to avoid building a reader and an extra
+        #       call frame per file, a try block costs nothing when nothing is raised.
+        try:
+            read_into(filelist[idx], out=stack[idx])
+        except Exception as e:
+            # NOTE: reading into the stack also fails for an image with another dtype or
+            #       shape than the first one, which is hence read on its own.
+            try:
+                image = reader(filelist[idx])
+            except Exception:
+                logger.error(f"While reading {filelist[idx]}, the following error occurred: {e}")
+                return
+            if image.shape != stack.shape[1:]:
+                raise ValueError(
+                    f"{filelist[idx]} has shape {image.shape}, " f"expected {stack.shape[1:]} from {filelist[first]}."
+                )
+            mismatched[idx] = image
+        loaded[idx] = True
+
+    remaining = range(first, len(filelist))
     # NOTE: For regular dataset, single thread reading is actually faster
     #       as the overhead of multiprocessing will overshadow the benefits.
     if max_workers == 1:
         progress_bar = tqdm if tqdm_class is None else tqdm_class
         # single thread reading
-        rst = [_forgiving_reader(f, reader) for f in progress_bar(filelist, desc=desc)]
+        for idx in progress_bar(remaining, desc=desc):
+            load(idx)
     else:
         # multi-thread reading
-        # NOTE: the benefits of multi-threading is only visible when
-        #       - the file list is really long
-        #       - there are a lot of cores available
-        kwargs = {
-            "max_workers": max_workers,
-            "chunksize": calculate_chunksize(len(filelist), max_workers),
-            "desc": desc,
-        }
-        rst = process_map(partial(_forgiving_reader, reader=reader), filelist, **kwargs)
-
-    # return the results
+        # NOTE: the decoding in tifffile and astropy releases the GIL, hence threads
+        #       read in parallel without pickling every image back from a worker
+        #       process.
+        kwargs = {"max_workers": max_workers, "desc": desc}
+        if tqdm_class is not None:
+            kwargs["tqdm_class"] = tqdm_class
+        thread_map(load, remaining, **kwargs)
+
+    if mismatched:
+        # upcast the stack as np.array would for images of mixed dtypes
+        dtype = np.result_type(stack.dtype, *[image.dtype for image in mismatched.values()])
+        if dtype != stack.dtype:
+            logger.warning(f"Mixed image dtypes in {desc}, converting the stack from {stack.dtype} to {dtype}.")
+            if isinstance(stack, np.memmap):
+                # keep a stack too large for the memory out of it
+                upcast = _memmap_stack(stack.shape, dtype, memmap_folder)
+                upcast[...] = stack
+                stack = upcast
+            else:
+                stack = stack.astype(dtype)
+        for idx, image in mismatched.items():
+            stack[idx] = image
+
+    # return the results, skipping the files that could not be read
     # NOTE: there is no need to convert to float at this point, and it will save
     #       a lot of memory and time if the conversion is done after cropping.
-    return np.array([me for me in rst if me is not None])
+    if loaded.all():
+        return stack
+    # NOTE: the images read are moved up in place rather than gathered into a new
+    #       array, which keeps a memory-mapped stack out of memory.
+    indices = np.flatnonzero(loaded)
+    for dst, src in enumerate(indices):
+        if dst != src:
+            stack[dst] = stack[src]
+    return stack[: len(indices)]
+
+
+def _memmap_stack(shape: tuple, dtype: np.dtype, memmap_folder: Optional[FlexPath] = None) -> np.memmap:
+    """Allocate an image stack memory-mapped to a temporary file in ``memmap_folder``."""
+    directory = tempfile.gettempdir() if memmap_folder is None else str(memmap_folder)
+    logger.warning(f"Memory mapping a {shape} {np.dtype(dtype)} image stack to a temporary file in {directory}.")
+    return np.memmap(tempfile.TemporaryFile(dir=directory), mode="w+", dtype=dtype, shape=shape)
+
+
+def _available_memory() -> Optional[int]:
+    """Return the available physical memory in bytes, None if it cannot be determined."""
+    # NOTE: MemAvailable accounts for the page cache that can be reclaimed, which the free
+    #       pages from sysconf do not, hence the latter is only a fallback.
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _probe_tiff(filename: str) -> Tuple[tuple, np.dtype]:
+    """Return the shape and dtype of the image in a tiff file from its header only."""
+    with tifffile.TiffFile(filename) as tiff:
+        series = tiff.series[0]
+        return series.shape, series.dtype
+
+
+def _read_tiff_into(filename: str, out: np.ndarray) -> np.ndarray:
+    """Decode the image in a tiff file into ``out``, which must have the same shape."""
+    with tifffile.TiffFile(filename) as tiff:
+        series = tiff.series[0]
+        # NOTE: tifffile only compares the number of pixels with out, hence an image of
+        #       another shape would be silently reshaped into it.
+        if series.shape != out.shape:
+            raise ValueError(f"cannot read an image of shape {series.shape} into {out.shape}")
+        return series.asarray(out=out)
+
+
+def _probe_image(filename: str, reader: Callable) -> Tuple[tuple, np.dtype]:
+    """Return the shape and dtype of the image read with the given reader."""
+    image = reader(filename)
+    return image.shape, image.dtype
+
+
+def _read_into(filename: str, reader: Callable, out: np.ndarray) -> np.ndarray:
+    """Read an image with the given reader and copy it into ``out``, which must be able to hold it as is."""
+    image = reader(filename)
+    if image.shape != out.shape:
+        raise ValueError(f"cannot read an image of shape {image.shape} into {out.shape}")
+    np.copyto(out, image, casting="safe")
+    return out
 
 
 # use _func to avoid sphinx pulling it into docs
@@ -350,6 +514,7 @@ def _load_by_file_list(
     dc_fnmatch: Optional[str] = "*",
     max_workers: int = 0,
     tqdm_class=None,
+    memmap_folder: Optional[FlexPath] = None,
 ) -> Tuple[np.ndarray]:
     """
     Use provided list of files to load images into memory.
@@ -369,10 +534,12 @@ def _load_by_file_list(
     dc_fnmatch:
         fnmatch for selecting dc files from dc_dir.
     max_workers:
-        Maximum number of processes allowed during loading, 0 means
+        Maximum number of threads allowed during loading. 0 means
         use as many as possible.
     tqdm_class: panel.widgets.Tqdm
         Class to be used for rendering tqdm progress
+    memmap_folder:
+        Directory of the temporary files backing the stacks too large to fit in memory.
 
     Returns
     -------
@@ -396,6 +563,7 @@ def _load_by_file_list(
         desc="ct",
         max_workers=max_workers,
         tqdm_class=tqdm_class,
+        memmap_folder=memmap_folder,
     )
     # -- open beam
     ob = _load_images(
@@ -403,6 +571,7 @@ def _load_by_file_list(
         desc="ob",
         max_workers=max_workers,
         tqdm_class=tqdm_class,
+        memmap_folder=memmap_folder,
     )
     # -- dark current
     if dc_files == []:
@@ -413,6 +582,7 @@ def _load_by_file_list(
             desc="dc",
             max_workers=max_workers,
             tqdm_class=tqdm_class,
+            memmap_folder=memmap_folder,
         )
     #
     return ct, ob, dc
@@ -456,22 +626,22 @@ def _get_filelist_by_dir(
     # sanity check
     ##########
     # -- Process input argument ct_dir for radiographs
-    if not Path(ct_dir).exists():
+    # NOTE: the directories are checked with os.path on the given paths directly, without
+    #       building Path objects.
+    if not os.path.isdir(ct_dir):
         logger.error(f"ct_dir {ct_dir} does not exist.")
         raise ValueError("ct_dir does not exist.")
-    else:
-        ct_dir = Path(ct_dir)
     ##########
     # -- Process input argument ob_dir for open beam directories
     if isinstance(ob_dir, (str, Path)):  # single directory
-        open_beam_dirs = [Path(ob_dir)]  # cast the single directory to a list of input directories
+        open_beam_dirs = [ob_dir]  # cast the single directory to a list of input directories
     elif isinstance(ob_dir, (list, tuple)):  # multiple input directories, assumed items are of FlexPath type
-        open_beam_dirs = [Path(data_dir) for data_dir in ob_dir]
+        open_beam_dirs = list(ob_dir)
     else:
         raise ValueError("ob_dir must be either a string or a list of strings")
     # validate for existence
     for data_dir in open_beam_dirs:
-        if not data_dir.exists():
+        if not os.path.isdir(data_dir):
             logger.error(f"open beam directory {str(data_dir)} does not exist.")
             raise ValueError(f"open beam directory {str(data_dir)} does not exist.")
     ##########
@@ -481,30 +651,35 @@ def _get_filelist_by_dir(
         dark_field_dirs = []
     else:
         if isinstance(dc_dir, (str, Path)):  # single directory
-            dark_field_dirs = [Path(dc_dir)]  # cast the single directory to a list of input directories
+            dark_field_dirs = [dc_dir]  # cast the single directory to a list of input directories
         elif isinstance(dc_dir, (list, tuple)):  # multiple directories, assumed items are of FlexPath type
-            dark_field_dirs = [Path(data_dir) for data_dir in dc_dir]
+            dark_field_dirs = list(dc_dir)
         else:
             raise ValueError("dc_dir must be either a string or a list of strings")
     # check for existence
     for i, data_dir in enumerate(dark_field_dirs):
-        if not data_dir.exists():
+        if not os.path.isdir(data_dir):
             logger.warning(f"dark field directory {str(data_dir)} does not exist, ignoring.")
             dark_field_dirs[i] = None
     dark_field_dirs = [data_dir for data_dir in dark_field_dirs if data_dir is not None]  # extricate None entries
 
+    # NOTE: translate each fnmatch pattern to a regex once, it is then reused for
+    #       every entry of every directory scanned.
+    ct_re = _compile_fnmatch(ct_fnmatch)
+    ob_re = _compile_fnmatch(ob_fnmatch)
+    dc_re = _compile_fnmatch(dc_fnmatch)
+
     # gather the ct_files
-    ct_files = ct_dir.glob(ct_fnmatch)
+    # NOTE: the files are sorted so that angles can be properly retrieved if needed
+    ct_files = _list_dir(ct_dir, ct_re)
     # try to use the first ct file as a reference
-    # NOTE: do not use the generator above to avoid off by one error due to
-    #       consuming the generator
-    try:
-        ct_ref = next(ct_dir.glob(ct_fnmatch))
-    except StopIteration:
+    if ct_files:
+        ct_ref = ct_files[0]
+    else:
         logger.warning("ct_files is [].")
         ct_ref = None
-    metadata_ref = None if ct_ref is None else MetaData(filename=str(ct_ref), datatype="ct")
-    ext_ref = None if ct_ref is None else ct_ref.suffix
+    metadata_ref = None if ct_ref is None else MetaData(filename=ct_ref, datatype="ct")
+    ext_re = None if ct_ref is None else _compile_fnmatch(f"*{os.path.splitext(ct_ref)[1]}")
 
     # gather the ob_files
     if ob_fnmatch is None:
@@ -512,13 +687,11 @@ def _get_filelist_by_dir(
             logger.warning("ob_files is [].")
             ob_files = []
         else:
-            ob_files = list()
-            for open_beam_dir in open_beam_dirs:
-                obfs = open_beam_dir.glob(f"*{ext_ref}")
-                # remove files that do not match the metadata of ct_ref
-                ob_files += [f for f in obfs if metadata_ref.match(other_filename=str(f), other_datatype="ob")]
+            obfs = list(itertools.chain(*[_list_dir(obd, ext_re) for obd in open_beam_dirs]))
+            # remove files that do not match the metadata of ct_ref
+            ob_files = _match_metadata(metadata_ref, obfs, "ob")
     else:
-        ob_files = list(itertools.chain(*[list(obd.glob(ob_fnmatch)) for obd in open_beam_dirs]))
+        ob_files = list(itertools.chain(*[_list_dir(obd, ob_re) for obd in open_beam_dirs]))
 
     # gather the dc_files
     if dc_dir is None:
@@ -529,20 +702,80 @@ def _get_filelist_by_dir(
                 logger.warning("dc_files is [].")
                 dc_files = []
             else:
-                dc_files = list()
-                for dark_field_dir in dark_field_dirs:
-                    dcfs = dark_field_dir.glob(f"*{ext_ref}")
-                    # remove files that do not match the metadata of ct_ref
-                    dc_files += [f for f in dcfs if metadata_ref.match(other_filename=str(f), other_datatype="dc")]
+                dcfs = list(itertools.chain(*[_list_dir(dcd, ext_re) for dcd in dark_field_dirs]))
+                # remove files that do not match the metadata of ct_ref
+                dc_files = _match_metadata(metadata_ref, dcfs, "dc")
         else:
-            dc_files = list(itertools.chain(*[list(dcf.glob(dc_fnmatch)) for dcf in dark_field_dirs]))
+            dc_files = list(itertools.chain(*[_list_dir(dcf, dc_re) for dcf in dark_field_dirs]))
+
+    return ct_files, ob_files, dc_files
+
+
+def _match_metadata(metadata_ref: MetaData, filelist: List[str], datatype: str) -> List[str]:
+    """
+    Select the files with metadata matching the reference.
 
-    # since generator returns an unordered list, we need to force it to be sorted
-    # so that angles can be properly retrieved if needed
-    ct_files = list(map(str, ct_files))
-    ct_files.sort()
+    Parameters
+    ----------
+    metadata_ref:
+        Metadata of the reference file.
+    filelist:
+        List of candidate files.
+    datatype:
+        Data type of the candidate files, i.e. ob or dc.
 
-    return ct_files, list(map(str, ob_files)), list(map(str, dc_files))
+    Returns
+    -------
+        The candidate files matching the reference, in the same order.
+    """
+    if not filelist:
+        return []
+    # NOTE: each candidate needs its own header read, which are independent blocking
+    #       reads, hence run concurrently.
+    match = partial(metadata_ref.match, other_datatype=datatype)
+    with ThreadPoolExecutor(max_workers=min(32, len(filelist))) as executor:
+        is_match = list(executor.map(match, filelist))
+    return [filename for filename, matched in zip(filelist, is_match) if matched]
+
+
+def _compile_fnmatch(pattern: Optional[str]) -> Optional[re.Pattern]:
+    """
+    Compile a fnmatch pattern into a regular expression.
+
+    Parameters
+    ----------
+    pattern:
+        fnmatch pattern, or None.
+
+    Returns
+    -------
+        The compiled pattern, or None if no pattern is given.
+    """
+    if pattern is None:
+        return None
+    return re.compile(fnmatch.translate(os.path.normcase(pattern)))
+
+
+def _list_dir(directory: FlexPath, pattern: re.Pattern) -> List[str]:
+    """
+    List the files of a directory matching the given pattern.
+
+    Parameters
+    ----------
+    directory:
+        Directory to list.
+    pattern:
+        fnmatch pattern compiled with ``_compile_fnmatch``.
+
+    Returns
+    -------
+        Sorted list of the matching file paths.
+    """
+    # NOTE: a single scandir on plain strings is much cheaper than Path.glob, which
+    #       builds a Path object for every entry of the directory.
+    with os.scandir(directory) as entries:
+        names = [entry.name for entry in entries if entry.is_file() and pattern.match(os.path.normcase(entry.name))]
+    return [os.path.join(directory, name) for name in sorted(names)]
 
 
 def _extract_rotation_angles(
@@ -569,43 +802,47 @@ def _extract_rotation_angles(
         logger.error("filelist is [].")
         raise ValueError("filelist cannot be empty list.")
 
-    # process one file at a time
-    rotation_angles = []
-    for filename in filelist:
+    # first, let's try to extract the angles from the filenames, which needs no I/O
+    # NOTE: the angles are written straight into a float array, where nan marks the
+    #       angles that could not be extracted.
+    rotation_angles = np.full(len(filelist), np.nan)
+    missing = []
+    for idx, filename in enumerate(filelist):
         file_ext = Path(filename).suffix.lower()
-        angle = None
-        if file_ext == ".tiff":
-            # first, let's try to extract the angle from the filename
-            angle = extract_rotation_angle_from_filename(filename)
-            if angle is None:
-                # if failed, try to extract from metadata
-                angle = extract_rotation_angle_from_tiff_metadata(filename, metadata_idx)
-            if angle is None:
-                # if failed, log a warning and move on
-                logger.warning(f"Failed to extract rotation angle from {filename}.")
-        elif file_ext in (".tif", ".fits"):
-            # for tif and fits, we can only extract from filename as the metadata is not reliable
-            angle = extract_rotation_angle_from_filename(filename)
-            if angle is None:
-                # if failed, log a warning and move on
-                logger.warning(f"Failed to extract rotation angle from {filename}.")
-        else:
+        if file_ext not in (".tiff", ".tif", ".fits"):
             # if the file type is not supported, raise value error
             logger.error(f"Unsupported file type: {file_ext}")
             raise ValueError(f"Unsupported file type: {file_ext}")
-
-        rotation_angles.append(angle)
+        angle = extract_rotation_angle_from_filename(filename)
+        if angle is not None:
+            rotation_angles[idx] = angle
+        elif file_ext == ".tiff":
+            # only the .tiff metadata is reliable, .tif and .fits rely on the filename alone
+            missing.append(idx)
+
+    # if failed, try to extract from metadata
+    if missing:
+        reader = partial(extract_rotation_angle_from_tiff_metadata, metadata_idx=metadata_idx)
+        with ThreadPoolExecutor(max_workers=min(32, len(missing))) as executor:
+            for idx, angle in zip(missing, executor.map(reader, [filelist[idx] for idx in missing])):
+                if angle is not None:
+                    rotation_angles[idx] = angle
+
+    # if failed, log a warning and move on
+    is_missing = np.isnan(rotation_angles)
+    for idx in np.flatnonzero(is_missing):
+        logger.warning(f"Failed to extract rotation angle from {filelist[idx]}.")
 
     # this means we have a list of None
-    if all(angle is None for angle in rotation_angles):
+    if is_missing.all():
         logger.warning("Failed to extract any rotation angles.")
         return None
 
     # warn users if some angles are missing
-    if any(angle is None for angle in rotation_angles):
+    if is_missing.any():
         logger.warning("Some rotation angles are missing. You will see nan in the rotation angles array.")
 
-    return np.array(rotation_angles, dtype=float)
+    return rotation_angles
 
 
 def extract_rotation_angle_from_filename(filename: str) -> Optional[float]:
@@ -622,15 +859,8 @@ def extract_rotation_angle_from_filename(filename: str) -> Optional[float]:
         rotation_angle
             Rotation angle in degrees if successfully extracted, None otherwise.
     """
-    # extract rotation angle from file names
-    # Note
-    # ----
-    #   For the following file
-    #       20191030_ironman_small_0070_300_440_0520.tif(f)
-    #       20191030_ironman_small_0070_300_440_0520.fits
-    #   the rotation angle is 300.44 degrees
-    regex = r"\d{8}_\S*_\d{4}_(?P<deg>\d{3})_(?P<dec>\d{3})_\d*\.(?:tiff?|fits)"
-    match = re.match(regex, Path(filename).name)
+    # extract rotation angle from file names, see _ROTATION_ANGLE_REGEX
+    match = _ROTATION_ANGLE_REGEX.match(os.path.basename(filename))
     if match:
         rotation_angle = float(".".join(match.groups()))
     else:
@@ -638,6 +868,7 @@ def extract_rotation_angle_from_filename(filename: str) -> Optional[float]:
     return rotation_angle
 
 
+@lru_cache(maxsize=8192)
 def extract_rotation_angle_from_tiff_metadata(filename: str, metadata_idx: int = 65039) -> Optional[float]:
     """
     Extract rotation angle in degrees from metadata of a tiff file.
@@ -653,18 +884,32 @@ def extract_rotation_angle_from_tiff_metadata(filename: str, metadata_idx: int =
     -------
         rotation_angle
             Rotation angle in degrees if successfully extracted, None otherwise.
+
+    Notes
+    -----
+        The results are cached per file, such that scanning the same files again does not
+        reopen them. Call ``extract_rotation_angle_from_tiff_metadata.cache_clear()`` after
+        files have been rewritten in place.
     """
     try:
         # -- read metadata
         # img = tifffile.TiffFile("test_with_metadata_0.tiff")
         # img.pages[0].tags[65039].value
         # >> 'RotationActual:0.579840'
-        return float(tifffile.TiffFile(filename).pages[0].tags[metadata_idx].value.split(":")[-1])
+        # NOTE: only the header of the first page is parsed, the pixel data is never
+        #       decoded, and the file is closed right away.
+        with tifffile.TiffFile(filename) as tiff:
+            tag = tiff.pages[0].tags.get(metadata_idx)
+            if tag is None:
+                return None
+            value = tag.value
+        # NOTE: the value is "<name>:<angle>", the angle follows the last colon
+        return float(value.rpartition(":")[2])
     except Exception:
         return None
 
 
-def _save_data(filename: Path, data: np.ndarray, rot_angles: np.ndarray = None) -> None:
+def _save_data(filename: Path, data: np.ndarray, rot_angles: np.ndarray = None, single_file: bool = False) -> None:
     if data is None:
         raise ValueError("Failed to supply data")
     logger.info(f'saving tiffs to "{filename.parent}"')
@@ -672,8 +917,25 @@ def _save_data(filename: Path, data: np.ndarray, rot_angles: np.ndarray = None)
     # make sure the directory exists
     if not filename.parent.exists():
         filename.parent.mkdir(parents=True)
-    # save the stack of tiffs
-    dxchange.write_tiff_stack(data, fname=str(filename))
+
+    if single_file:
+        # save the stack as a single multi-page tiff, i.e. <filename>.tiff
+        # NOTE: the frames are streamed to one open file as contiguous pages, hence
+        #       a non-contiguous or memory-mapped stack is never copied as a whole.
+        #       BigTIFF is only needed past the 4 GB limit of classic tiff.
+        with tifffile.TiffWriter(f"{filename}.tiff", bigtiff=data.nbytes > 2**32 - 2**25) as writer:
+            for frame in data:
+                writer.write(frame, contiguous=True, photometric="minisblack")
+    else:
+        # save the stack of tiffs
+        # NOTE: each image goes to its own file, hence the files are written concurrently,
+        #       using the same naming as dxchange.write_tiff_stack, i.e. <filename>_#####.tiff
+        def write(idx: int) -> None:
+            dxchange.write_tiff(data[idx], fname=f"{filename}_{idx:05d}")
+
+        with ThreadPoolExecutor() as executor:
+            # consume the results to re-raise any exception from the writers
+            list(executor.map(write, range(data.shape[0])))
 
     # save the angles as a numpy object
     if rot_angles is not None:
@@ -699,6 +961,8 @@ class save_data(param.ParameterizedFunction):
         Used to name file of output, defaults to ``save_data``
     rot_angles: Array
         Optional for writing out the array of rotational (omega) angles
+    single_file: bool
+        Save the data as a single multi-page tiff ``<name>.tiff`` instead of one tiff per image
 
     Returns
     -------
@@ -709,6 +973,7 @@ class save_data(param.ParameterizedFunction):
     outputbase = param.Foldername(default="/tmp/", doc="radiograph directory")
     name = param.String(default="save_data", doc="name for the radiograph")
     rot_angles = param.Array(doc="Collection of omega angles")
+    single_file = param.Boolean(default=False, doc="save the data as a single multi-page tiff")
 
     def __call__(self, **params):
         """Parse inputs and perform multiple dispatch."""
@@ -725,7 +990,12 @@ class save_data(param.ParameterizedFunction):
         save_dir = Path(params.outputbase) / f"{params.name}_{to_time_str()}"
 
         # save the data as tiffs
-        _save_data(filename=save_dir / params.name, data=params.data, rot_angles=params.rot_angles)
+        _save_data(
+            filename=save_dir / params.name,
+            data=params.data,
+            rot_angles=params.rot_angles,
+            single_file=params.single_file,
+        )
 
         return save_dir
 
@@ -115,8 +115,10 @@ def _extract_metadata_from_tiff(
     metadata :
         dictionary of metadata extracted from the tiff file.
     """
-    tiff = tifffile.TiffFile(filename)
-    metadata = dict([tiff.pages[0].tags[i].value.split(":") for i in index])
+    # NOTE: only the tags of the first page are read, and the file is closed right away.
+    with tifffile.TiffFile(filename) as tiff:
+        tags = tiff.pages[0].tags
+        metadata = dict([tags[i].value.split(":") for i in index])
     # map to correct type
     for k, v in metadata.items():
         try:
@@ -1,8 +1,10 @@
+from functools import lru_cache
 from importlib.util import find_spec
 from importlib import import_module
 from typing import Tuple
 
 
+@lru_cache(maxsize=None)
 def _function_parts(func_str: str) -> Tuple[str, str]:
     """Convert the function specification into a module and function name."""
     mod_str = ".".join(func_str.split(".")[:-1])
@@ -11,11 +13,17 @@ def _function_parts(func_str: str) -> Tuple[str, str]:
     return (mod_str, func_str)
 
 
+@lru_cache(maxsize=None)
+def _module_spec(mod_str: str):
+    """Return the spec of the module, cached as the modules do not change while loading a workflow."""
+    return find_spec(mod_str)
+
+
 def function_exists(func_str: str) -> bool:
     """Return True if the function exists."""
     mod_str, func_str = _function_parts(func_str)
 
-    if not bool(find_spec(mod_str, func_str)):
+    if _module_spec(mod_str) is None:
         return False
     module = import_module(mod_str)
     return hasattr(module, func_str)
@@ -31,6 +31,12 @@ def _load_schema():
 SCHEMA: dict = _load_schema()
 del _load_schema
 
+# check the schema and build its validator once, rather than on every validation
+_VALIDATOR_CLASS = jsonschema.validators.validator_for(SCHEMA)
+_VALIDATOR_CLASS.check_schema(SCHEMA)
+_VALIDATOR = _VALIDATOR_CLASS(SCHEMA)
+del _VALIDATOR_CLASS
+
 
 def _validate_schema(json_obj: Dict) -> None:
     """Validate the data against the schema for jobs.
@@ -49,10 +55,10 @@ def _validate_schema(json_obj: Dict) -> None:
     -------
     None
     """
-    try:
-        jsonschema.validate(json_obj, schema=SCHEMA)
-    except jsonschema.ValidationError as e:
-        raise JSONValidationError("While validation configuration file") from e
+    # NOTE: same error reporting as jsonschema.validate
+    error = jsonschema.exceptions.best_match(_VALIDATOR.iter_errors(json_obj))
+    if error is not None:
+        raise JSONValidationError("While validation configuration file") from error
 
 
 def _validate_facility(json_obj: Dict) -> None:
@@ -1,13 +1,31 @@
 #!/usr/bin/env python3
 from functools import cache
+from unittest import mock
 import numpy as np
 import pytest
+import scipy.ndimage as ndi
 import tomopy
+from skimage import feature
 from imars3d.backend.corrections.intensity_fluctuation_correction import (
+    _canny,
+    _canny_stack,
+    _ifc_mp_context,
+    _normalize_bg_fast,
     intensity_fluctuation_correction,
+    intensity_fluctuation_correction_skimage,
     normalize_roi,
+    normalize_roi_fast,
 )
 
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+try:
+    import numba
+except ImportError:
+    numba = None
+
 np.random.seed(0)
 
 
@@ -79,6 +97,14 @@ def test_correct_with_tomopy():
     assert diff_corrected.var() < diff_raw.var()
 
 
+def test_normalize_bg_fast():
+    # the vectorized version should reproduce tomopy
+    projs_flickering = generate_flickering_projections(generate_fake_projections())[:8]
+    np.testing.assert_allclose(
+        _normalize_bg_fast(projs_flickering, 5), tomopy.normalize_bg(projs_flickering, air=5), rtol=1e-5
+    )
+
+
 def test_correct_with_imars3d():
     # get synthetic projections
     projs_ideal = generate_fake_projections()
@@ -92,6 +118,73 @@ def test_correct_with_imars3d():
     assert diff_corrected.var() < diff_raw.var()
 
 
+def test_correct_after_canny():
+    # running the canny kernel in this process first must not break the worker pool
+    projs = generate_flickering_projections(generate_fake_projections())[:8].astype(np.float32)
+    _canny(projs[0], 3)
+    projs_corrected = intensity_fluctuation_correction(ct=projs, air_pixels=-1, max_workers=2)
+    projs_ref = np.array([intensity_fluctuation_correction_skimage(proj) for proj in projs])
+    np.testing.assert_allclose(projs_corrected, projs_ref, rtol=1e-6)
+
+
+@pytest.mark.skipif(numba is None, reason="numba is not installed")
+def test_ifc_mp_context():
+    # the default start method is kept until the numba threading layer has started
+    with mock.patch.object(numba, "threading_layer", side_effect=ValueError):
+        assert _ifc_mp_context() is None
+    with mock.patch.object(numba, "threading_layer", return_value="tbb"):
+        assert _ifc_mp_context().get_start_method() in ("forkserver", "spawn")
+
+
+@pytest.mark.skipif(cp is None, reason="cupy is not installed")
+def test_correct_with_cuda():
+    # get synthetic projections
+    projs_ideal = generate_fake_projections()
+    # generate the corresponding flickering projections
+    projs_flickering = generate_flickering_projections(projs_ideal)
+    # perform correction on the GPU
+    projs_corrected = intensity_fluctuation_correction(ct=projs_flickering, air_pixels=-1, backend="cuda")
+    # verify
+    diff_raw = projs_flickering - projs_ideal
+    diff_corrected = projs_corrected - projs_ideal
+    assert diff_corrected.var() < diff_raw.var()
+
+
+def test_canny_stack():
+    # the batched canny should reproduce skimage on every image of the stack
+    projs = generate_flickering_projections(generate_fake_projections())[:8]
+    projs = projs / projs.max()
+    for sigma in (1, 3):
+        edges = _canny_stack(projs, sigma, np, ndi)
+        edges_ref = np.array([feature.canny(proj, sigma=sigma) for proj in projs])
+        np.testing.assert_array_equal(edges, edges_ref)
+
+
+@pytest.mark.skipif(numba is None, reason="numba is not installed")
+def test_canny_numba():
+    # the numba canny should reproduce skimage, both working in float32
+    projs = generate_flickering_projections(generate_fake_projections())[:8]
+    projs = projs / projs.max()
+    for proj in (projs[0], projs[1].astype(np.float32)):
+        for sigma in (1, 3):
+            np.testing.assert_array_equal(_canny(proj, sigma), feature.canny(proj.astype(np.float32), sigma=sigma))
+    # integer images are scaled by skimage itself
+    proj = (projs[2] * 60_000).astype(np.uint16)
+    for sigma in (1, 3):
+        np.testing.assert_array_equal(_canny(proj, sigma), feature.canny(proj, sigma=sigma))
+
+
+def test_correct_without_edges():
+    # rows without any edge use the whole margins as air pixels
+    flat = np.full((16, 32), 2.0)
+    np.testing.assert_allclose(intensity_fluctuation_correction_skimage(flat), np.ones_like(flat))
+    # a gentle ramp has no edge either, the air pixels are the two 8 pixel wide margins
+    ramp = np.tile(1.0 + 0.01 * np.minimum(np.arange(32), 16)[::-1], (16, 1))
+    np.testing.assert_allclose(
+        intensity_fluctuation_correction_skimage(ramp), ramp / ramp[:, np.r_[0:8, 24:32]].mean()
+    )
+
+
 def test_incorrect_input_array():
     projs_incorrect = np.array([1, 2, 3])
     with pytest.raises(ValueError):
@@ -106,6 +199,8 @@ def test_normalize_roi():
     diff_raw = projs_flickering - projs_ideal
     diff_corrected = projs_corrected - projs_ideal
     assert diff_corrected.var() < diff_raw.var()
+    # the fast path skips the validation only
+    np.testing.assert_array_equal(normalize_roi_fast(projs_flickering, [0, 0, 10, 10]), projs_corrected)
 
 
 if __name__ == "__main__":
@@ -27,15 +27,16 @@ import pytest
 import tifffile
 
 # standard imports
-from copy import deepcopy
 from functools import partial
 from pathlib import Path
 from unittest import mock
 from unittest.mock import MagicMock
 
 
-@pytest.fixture(scope="function")
-def data_fixture(tmpdir):
+@pytest.fixture(scope="module")
+def data_fixture(tmp_path_factory):
+    # the files are only read by the tests, hence written once per module
+    tmpdir = tmp_path_factory.mktemp("data")
     # dummy tiff image data
     data = np.ones((3, 3))
     #
@@ -123,6 +124,10 @@ def test_load_data(
     # case_2: load data from given directory
     rst = load_data(ct_dir="/tmp", ob_dir="/tmp", dc_dir="/tmp")
     np.testing.assert_almost_equal(np.array(rst).flatten(), np.arange(1, 5, dtype=float))
+    # case_3: the folder backing the large stacks is passed down, not taken as a directory signature
+    rst = load_data(ct_files=["1", "2"], ob_files=["3", "4"], memmap_folder="/tmp")
+    np.testing.assert_almost_equal(np.array(rst).flatten(), np.arange(1, 5, dtype=float))
+    assert mock__load_by_file_list.call_args.kwargs["memmap_folder"] == "/tmp"
 
 
 def test_forgiving_reader():
@@ -134,7 +139,7 @@ def test_forgiving_reader():
     assert _forgiving_reader(filename="test", reader=badReader) is None
 
 
-def test_load_images(data_fixture):
+def test_load_images(data_fixture, tmp_path):
     generic_tiff, good_tiff, metadata_tiff, generic_fits = list(map(str, data_fixture))
     func = partial(_load_images, desc="test", max_workers=2, tqdm_class=None)
     # error_0 case: unsupported file format
@@ -149,6 +154,36 @@ def test_load_images(data_fixture):
     fits_filelist = [generic_fits, generic_fits]
     rst = func(filelist=fits_filelist)
     assert rst.shape == (2, 3, 3)
+    # case_2: tiff loaded into a memory map, as if the stack did not fit in memory
+    with mock.patch("imars3d.backend.dataio.data._available_memory", return_value=0):
+        rst = func(filelist=tiff_filelist, memmap_folder=tmp_path)
+    assert isinstance(rst, np.memmap)
+    assert rst.shape == (3, 3, 3)
+    np.testing.assert_array_equal(rst, func(filelist=tiff_filelist))
+    # case_3: images of mixed dtypes are upcast, as np.array would
+    int_tiff, float_tiff, large_tiff = [str(tmp_path / f"{name}.tiff") for name in ("int", "float", "large")]
+    tifffile.imwrite(int_tiff, np.full((3, 3), 7, dtype=np.uint16))
+    tifffile.imwrite(float_tiff, np.full((3, 3), 1.5, dtype=np.float32))
+    rst = func(filelist=[int_tiff, float_tiff])
+    assert rst.dtype == np.float32
+    np.testing.assert_array_equal(rst[:, 0, 0], [7.0, 1.5])
+    # case_4: images of mixed dtypes stay memory-mapped once upcast
+    with mock.patch("imars3d.backend.dataio.data._available_memory", return_value=0):
+        rst = func(filelist=[int_tiff, float_tiff], memmap_folder=tmp_path)
+    assert isinstance(rst, np.memmap)
+    assert rst.dtype == np.float32
+    np.testing.assert_array_equal(rst[:, 0, 0], [7.0, 1.5])
+    # error_1: images of different shapes
+    tifffile.imwrite(large_tiff, np.ones((4, 3), dtype=np.uint16))
+    with pytest.raises(ValueError):
+        func(filelist=[int_tiff, large_tiff])
+    # error_2: images with as many pixels but of different shapes
+    wide_tiff, tall_tiff = str(tmp_path / "wide.tiff"), str(tmp_path / "tall.tiff")
+    tifffile.imwrite(wide_tiff, np.ones((3, 4), dtype=np.uint16))
+    tifffile.imwrite(tall_tiff, np.ones((4, 3), dtype=np.uint16))
+    for max_workers in (1, 2):
+        with pytest.raises(ValueError):
+            func(filelist=[wide_tiff, tall_tiff], max_workers=max_workers)
 
 
 @mock.patch("imars3d.backend.dataio.data._load_images", return_value="a")
@@ -233,8 +268,10 @@ def ext_tags():
     }
 
 
-@pytest.fixture(scope="function")
-def tiff_with_metadata(tmpdir, ext_tags):
+@pytest.fixture(scope="module")
+def tiff_with_metadata(tmp_path_factory, ext_tags):
+    # the files are only read by the tests, hence written once per module
+    tmpdir = tmp_path_factory.mktemp("tiff_with_metadata")
     # create testing tiff images
     data = np.ones((3, 3))
     # write testing data
@@ -341,19 +378,16 @@ def test_get_filelist_by_dirs(tmpdir, caplog, ext_tags, tiff_with_metadata):
     )
     # corner case, open-beam directory is not a valid entry
     with pytest.raises(ValueError) as e:
-        kwargs = deepcopy(common)
-        kwargs["ob_dir"] = open(ct, "r")
+        kwargs = {**common, "ob_dir": open(ct, "r")}
         _get_filelist_by_dir(**kwargs)
     assert "ob_dir must be either a string or a list of strings" == str(e.value)
     # corner case, dark-field directory is not a valid entry
     with pytest.raises(ValueError) as e:
-        kwargs = deepcopy(common)
-        kwargs["dc_dir"] = open(ct, "r")
+        kwargs = {**common, "dc_dir": open(ct, "r")}
         _get_filelist_by_dir(**kwargs)
     assert "dc_dir must be either a string or a list of strings" == str(e.value)
     # corner case, dark-field directory doesn't exist
-    kwargs = deepcopy(common)
-    kwargs["dc_dir"].append(Path("/tmp/tHIs_dOEs_nOt_EXIsT"))
+    kwargs = {**common, "dc_dir": common["dc_dir"] + [Path("/tmp/tHIs_dOEs_nOt_EXIsT")]}
     caplog.clear()
     rst = _get_filelist_by_dir(**kwargs)
     assert "/tmp/tHIs_dOEs_nOt_EXIsT does not exist, ignoring" in caplog.text
@@ -362,13 +396,12 @@ def test_get_filelist_by_dirs(tmpdir, caplog, ext_tags, tiff_with_metadata):
     rst = _get_filelist_by_dir(**common)
     assert rst == ([ct], [ob_1, ob_2], [dc_1, dc_2])
     # case_1: load ct and ob, skipping dc
-    kwargs = deepcopy(common)
+    kwargs = dict(common)
     del kwargs["dc_dir"]
     rst = _get_filelist_by_dir(**kwargs)
     assert rst == ([ct], [ob_1, ob_2], [])
     # case_2: load ct, and detect ob and dc from metadata
-    kwargs = deepcopy(common)
-    kwargs.update(dict(ob_fnmatch=None, dc_fnmatch=None))
+    kwargs = {**common, "ob_fnmatch": None, "dc_fnmatch": None}
     rst = _get_filelist_by_dir(**kwargs)
     assert rst == ([ct], [ob_1, ob_2], [dc_1, dc_2])
     # case_3: load ct, and detect ob from metadata
@@ -421,8 +454,12 @@ def check_savefiles(direc: Path, prefix: str, num_files: int = 3, has_omega=Fals
         assert filepath.name.startswith(prefix)
 
 
+_FAKE_DATA = np.ones((3, 3, 3), dtype=np.float64)
+
+
 def create_fake_data():
-    return np.zeros((3, 3, 3)) + 1.0
+    # copy, so that no test can alter the data seen by the others
+    return _FAKE_DATA.copy()
 
 
 @pytest.mark.parametrize("name", ["junk", ""])  # gets default name
@@ -458,6 +495,16 @@ def test_save_data_subdir(tmpdir):
     check_savefiles(outputdir, "subdirtest_")
 
 
+def test_save_data_single_file(tmpdir):
+    data = create_fake_data()
+    # run the code
+    outputdir = save_data(data=data, outputbase=tmpdir, name="stack", single_file=True)
+    # check the result
+    filepaths = list(outputdir.iterdir())
+    assert [filepath.name for filepath in filepaths] == ["stack.tiff"]
+    np.testing.assert_array_equal(tifffile.imread(filepaths[0]), data)
+
+
 def test_save_checkpoint(tmpdir):
     name = "chktest"
     data = create_fake_data()